@@ -1,43 +1,106 @@
 from __future__ import annotations
 
+import atexit
+import logging
+import logging.handlers
+import math
+import queue
+import sys
+import threading
 import time
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, List, Tuple, Iterator
+from typing import Callable, Deque, List, Optional, Tuple, Iterator
 
 from src.music.readmusic import get_now_playing
-from src.sensors.serial_rr_reader import rr_stream
+from src.sensors.serial_rr_reader import RRMessage, rr_stream
 from src.signal.pnn50 import PNN50Calculator
 from src.signal.state import FixedBaselineClassifier, Status
 from src.storage.db import DigMusicDB, EventRow
 
 from pathlib import Path
 
+# False のときは呼び出し側の `if DEBUG_PRINT:` でf-string生成ごと省く
 DEBUG_PRINT = False
 
 LOG_PATH = Path("logs") / "measure_debug.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
 
+# PNN50Calculator が受け付ける最短RR(200ms)から見た最大拍数/秒
+HR_MAX_BEATS_PER_SEC = 1000.0 / 200
+# HRグラフのスナップショットを作り直す最短間隔。GUIの描画間隔（33ms）より細かく作っても表示されない
+HR_SNAPSHOT_MIN_SEC = 1.0 / 30
 
-def _dbg(msg: str) -> None:
-    if not DEBUG_PRINT:
-        return
+# センサースレッド → 計測ループ のキュー
+RR_QUEUE_SIZE = 256
+RR_QUEUE_POLL_SEC = 0.1
+_RR_END = object()  # rr_stream 終了の目印
+
+# 保存対象になる状態（Enumメンバは単一インスタンスなので is / set で判定できる）
+_SAVE_STATUSES = frozenset((Status.CHILL, Status.HYPE))
+
+# イベント保存はメモリに溜めてまとめて書く（件数 or 経過秒で flush）
+EVENT_FLUSH_MAX_ROWS = 8
+EVENT_FLUSH_SEC = 5.0
+_DB_END = object()  # DB書き込みスレッド終了の目印
+
+
+_log = logging.getLogger("measure")
+_log_listener: Optional[logging.handlers.QueueListener] = None
+# 曲名ポーリングスレッドと計測ループの両方から初回の _dbg が来うるので、準備は1回だけにする
+_log_setup_lock = threading.Lock()
+
+
+def _setup_debug_log() -> None:
+    """
+    console / file への書き込みは QueueListener のスレッドに任せる。
+    計測ループ側はキューに積むだけで、ファイルを開いたり書いたりしない。
+    """
+    global _log_listener
+
+    handlers: list[logging.Handler] = []
 
     # 1) console
-    try:
-        print(msg, flush=True)
-    except Exception:
-        pass
+    if sys.stdout is not None:
+        handlers.append(logging.StreamHandler(sys.stdout))
 
     # 2) file (GUIでstdoutが死んでも残る)
     try:
         LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with LOG_PATH.open("a", encoding="utf-8") as f:
-            f.write(msg + "\n")
+        handlers.append(
+            logging.handlers.RotatingFileHandler(
+                LOG_PATH,
+                maxBytes=LOG_MAX_BYTES,
+                backupCount=LOG_BACKUP_COUNT,
+                encoding="utf-8",
+            )
+        )
     except Exception:
         pass
 
+    log_q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _log.addHandler(logging.handlers.QueueHandler(log_q))
+    _log.setLevel(logging.DEBUG)
+    _log.propagate = False
+
+    _log_listener = logging.handlers.QueueListener(log_q, *handlers)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
 
-@dataclass
+def _dbg(msg: str) -> None:
+    if not DEBUG_PRINT:
+        return
+    if _log_listener is None:
+        with _log_setup_lock:
+            if _log_listener is None:
+                _setup_debug_log()
+    _log.debug(msg)
+
+
+@dataclass(slots=True, frozen=True)
 class LiveState:
     mode: str  # "REST" or "RUN"
     rest_remain_sec: Optional[int]
@@ -47,7 +110,7 @@ class LiveState:
     baseline: Optional[float]
     status: Status
     track_text: str
-    hr_points: List[Tuple[float, float]]  # (epoch, hr)
+    hr_points: Tuple[Tuple[float, float], ...]  # (time.monotonic(), hr) 読み取り専用スナップショット
     event_message: Optional[str] = None
 
 
@@ -88,30 +151,63 @@ class MeasureSession:
         )
 
         self._stop = False
+        self._sensor_stop = threading.Event()
+        self._rr_q: "queue.Queue[object]" = queue.Queue(maxsize=RR_QUEUE_SIZE)
 
         # REST計測用
-        self.rest_end_epoch: Optional[float] = None
-        self.rest_p_values: List[float] = []
-        self.rest_hr_values: List[float] = []  # ★追加：REST中のHR平均もbaselineに必要
+        self.rest_deadline: Optional[float] = None
+        # サンプルは溜めずに件数と平均だけ逐次更新する（Welford）
+        self.rest_p_n: int = 0
+        self.rest_p_mean: float = 0.0
+        self.rest_hr_n: int = 0  # ★追加：REST中のHR平均もbaselineに必要
+        self.rest_hr_mean: float = 0.0
 
         # baseline固定値（UI用）
         self.baseline_fixed: Optional[float] = None
 
-        # 曲名
-        self.last_track_poll = 0.0
+        # 曲名（WinRT 呼び出しは別スレッドで回し、計測ループは最新値を読むだけ）
+        self._track_stop = threading.Event()
+        self._track_lock = threading.Lock()
+        self._now_playing: Optional[Tuple[str, str]] = None
+        # get_now_playing の例外（計測ループ側で raise して worker のエラー通知に乗せる）
+        self._track_error: Optional[Exception] = None
         self.track_text = "—"
+        self._last_now_playing: Optional[Tuple[str, str]] = None
+        # 保存用に分割済みの曲情報（曲が変わった時だけ更新）
+        self._track_artist = "Unknown"
+        self._track_name = "—"
+        self._track_version = 0
 
         # HRグラフ用
-        self.hr_points: List[Tuple[float, float]] = []
+        # 窓内に入りうる最大点数で上限を固定（異常なRR連打でも伸びない）
+        hr_cap = math.ceil(self.hr_window_sec * HR_MAX_BEATS_PER_SEC) + 1
+        self.hr_points: Deque[Tuple[float, float]] = deque(maxlen=hr_cap)
+        # LiveState に渡す不変スナップショット（GUIスレッドに渡しても安全）。
+        # 溜まったRRを一気に処理している間は描画間隔に1回だけ作り直し、その間の yield は同じ tuple を共有する
+        self._hr_snapshot: Tuple[Tuple[float, float], ...] = ()
+        self._hr_snapshot_at = float("-inf")
+        # 先頭の点が窓から外れる時刻。これより前は削除チェック自体を省く
+        self._next_hr_expiry = float("inf")
 
         # 15秒継続保存用の状態
         self._pending_status: Optional[Status] = None
         self._pending_since: Optional[float] = None
-        self._pending_track: Optional[str] = None
+        self._pending_track_version: Optional[int] = None
         self._pending_saved: bool = False
         self._pending_required_sec: float = 15.0
         self._last_event_message: Optional[str] = None
 
+        # 未保存イベント（DBへは _flush_events でまとめて書く）
+        self._event_buffer: List[EventRow] = []
+        self._event_buffer_since: Optional[float] = None
+        # 直近に保存対象にしたイベントの ts（DBに書き終わる前でもクールダウン判定に使う）
+        self._last_event_ts: Optional[datetime] = None
+
+        # DBへの書き込みは別スレッドで行い、計測ループを commit で止めない
+        self._db_q: "queue.SimpleQueue[object]" = queue.SimpleQueue()
+        self._db_writer: Optional[threading.Thread] = None
+        self._db_error: Optional[Exception] = None
+
         # 参考用（ログ）
         self._last_status: Status = Status.NEUTRAL
 
@@ -120,37 +216,205 @@ class MeasureSession:
         _dbg("[MeasureSession] stop requested")
 
     def _stop_check(self) -> bool:
-        return self._stop
+        return self._stop or self._sensor_stop.is_set()
+
+    def _put_rr(self, item: object) -> None:
+        # キューが詰まっていても停止要求が来たら諦める（スレッドを残さない）
+        while True:
+            try:
+                self._rr_q.put(item, timeout=RR_QUEUE_POLL_SEC)
+                return
+            except queue.Full:
+                if self._stop_check():
+                    return
+
+    def _sensor_loop(self) -> None:
+        """
+        バックグラウンドで rr_stream を回し、受信したRRをキューに積む。
+        例外も計測ループ側で raise できるようにキュー経由で渡す。
+        """
+        try:
+            for msg in rr_stream(
+                port=self.serial_port,
+                baudrate=self.baudrate,
+                stop_check=self._stop_check,
+            ):
+                self._put_rr(msg)
+        except Exception as e:
+            self._put_rr(e)
+        finally:
+            self._put_rr(_RR_END)
+
+    def _iter_rr(self) -> Iterator[RRMessage]:
+        """
+        シリアル読み取りを別スレッドに逃がし、ここではキューから取り出すだけにする。
+        （readline や DB保存が互いの待ち時間をブロックしない）
+        """
+        self._sensor_stop.clear()
+        self._rr_q = queue.Queue(maxsize=RR_QUEUE_SIZE)
+        sensor = threading.Thread(target=self._sensor_loop, name="rr-sensor", daemon=True)
+        sensor.start()
+
+        try:
+            while not self._stop:
+                try:
+                    item = self._rr_q.get(timeout=RR_QUEUE_POLL_SEC)
+                except queue.Empty:
+                    continue
+
+                if item is _RR_END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # 計測ループが抜けたらセンサースレッドも止め、ポートを閉じ終わるまで待つ
+            # （rr_stream は read の timeout=1 ごとに stop_check を見るので、すぐ抜ける）
+            self._sensor_stop.set()
+            sensor.join()
+
+    def _track_loop(self) -> None:
+        """
+        バックグラウンドで track_poll_interval ごとに get_now_playing を呼び、結果を保持する。
+        例外が出たら保持して止まる（計測ループ側の _poll_track で raise する）。
+        """
+        while not self._track_stop.is_set():
+            try:
+                np = get_now_playing()
+            except Exception as e:
+                _dbg(f"[TRACK] get_now_playing failed: {e!r}")
+                with self._track_lock:
+                    self._track_error = e
+                return
+            with self._track_lock:
+                self._now_playing = np
+            self._track_stop.wait(self.track_poll_interval)
+
+    def _start_track_poller(self) -> threading.Thread:
+        self._track_stop.clear()
+        with self._track_lock:
+            self._now_playing = None
+            self._track_error = None
+        poller = threading.Thread(target=self._track_loop, name="track-poller", daemon=True)
+        poller.start()
+        return poller
 
     def _poll_track(self) -> None:
-        now = time.time()
-        if now - self.last_track_poll < self.track_poll_interval:
+        # ブロックしない：ポーリングスレッドが取った最新値を見るだけ
+        with self._track_lock:
+            np = self._now_playing
+            err = self._track_error
+        if err is not None:
+            raise err
+        # 前回と同じ曲なら track_text を作り直さない
+        if np == self._last_now_playing:
             return
-        self.last_track_poll = now
+        self._last_now_playing = np
+        self._track_version += 1
 
-        np = get_now_playing()
         if np is None:
             self.track_text = "—"
+            self._track_artist, self._track_name = "Unknown", "—"
             return
         artist, track = np
-        self.track_text = f"{artist or 'Unknown'} - {track or 'Unknown'}"
+        self._track_artist = artist or "Unknown"
+        self._track_name = track or "Unknown"
+        self.track_text = f"{self._track_artist} - {self._track_name}"
 
-    def _push_hr(self, hr: Optional[float]) -> None:
+    def _push_hr(self, hr: Optional[float], now: float) -> None:
         if hr is None:
             return
-        now = time.time()
-        self.hr_points.append((now, float(hr)))
-        start = now - self.hr_window_sec
-        self.hr_points = [(t, v) for (t, v) in self.hr_points if t >= start]
+        was_empty = not self.hr_points
+        self.hr_points.append((now, hr))
+        if was_empty:
+            self._next_hr_expiry = now + self.hr_window_sec
+        elif now >= self._next_hr_expiry:
+            # 古い点は左端にしか無いので popleft で落とす（毎回作り直さない）
+            # 今追加した点は必ず窓内なので空にはならない
+            start = now - self.hr_window_sec
+            while self.hr_points[0][0] < start:
+                self.hr_points.popleft()
+            self._next_hr_expiry = self.hr_points[0][0] + self.hr_window_sec
+        # 次のRRがもう届いている間は作り直しを間引く（キューが空になった最後の拍では必ず作る）
+        if now - self._hr_snapshot_at >= HR_SNAPSHOT_MIN_SEC or self._rr_q.empty():
+            self._hr_snapshot = tuple(self.hr_points)
+            self._hr_snapshot_at = now
 
     def _reset_pending(self, reason: str) -> None:
         if self._pending_status is not None:
-            _dbg(f"[PENDING] reset ({reason})")
+            if DEBUG_PRINT:
+                _dbg(f"[PENDING] reset ({reason})")
         self._pending_status = None
         self._pending_since = None
-        self._pending_track = None
+        self._pending_track_version = None
         self._pending_saved = False
 
+    def _db_writer_loop(self) -> None:
+        """
+        キューに積まれた書き込みを順に実行する。失敗したら以降は捨てて、計測ループ側で raise する。
+        """
+        while True:
+            item = self._db_q.get()
+            if item is _DB_END:
+                return
+            if self._db_error is not None:
+                continue
+            fn, args = item
+            try:
+                fn(*args)
+            except Exception as e:
+                self._db_error = e
+
+    def _start_db_writer(self) -> None:
+        self._db_error = None
+        self._db_writer = threading.Thread(target=self._db_writer_loop, name="db-writer", daemon=True)
+        self._db_writer.start()
+
+    def _stop_db_writer(self) -> None:
+        # キューに残っている分を書き終わるまで待つ
+        if self._db_writer is None:
+            return
+        self._db_q.put(_DB_END)
+        self._db_writer.join()
+        self._db_writer = None
+
+    def _submit_db(self, fn: Callable[..., object], *args: object) -> None:
+        self._db_q.put((fn, args))
+
+    def _raise_db_error(self) -> None:
+        if self._db_error is not None:
+            raise self._db_error
+
+    def _cooldown_ok(self, ts: datetime) -> bool:
+        # バッファや書き込み待ちのイベントの方が新しいので、あればそちらで判定する
+        if self._last_event_ts is not None:
+            return (ts - self._last_event_ts).total_seconds() >= self.cooldown_seconds
+        return self.db.should_save_event_cooldown(ts, self.cooldown_seconds)
+
+    def _enqueue_event(self, event: EventRow, now: float) -> None:
+        if not self._event_buffer:
+            self._event_buffer_since = now
+        self._event_buffer.append(event)
+        self._last_event_ts = event.ts
+
+    def _maybe_flush_events(self, now: float) -> None:
+        if not self._event_buffer:
+            return
+        if (
+            len(self._event_buffer) >= EVENT_FLUSH_MAX_ROWS
+            or now - self._event_buffer_since >= EVENT_FLUSH_SEC
+        ):
+            self._flush_events()
+
+    def _flush_events(self) -> None:
+        if not self._event_buffer:
+            return
+        rows, self._event_buffer = self._event_buffer, []
+        self._event_buffer_since = None
+        self._submit_db(self.db.insert_events_batch, rows)
+        if DEBUG_PRINT:
+            _dbg(f"[SAVE] flushed {len(rows)} event(s)")
+
     def _emit_event_message(self, message: str) -> None:
         self._last_event_message = message
 
@@ -161,7 +425,7 @@ class MeasureSession:
 
     def _update_pending_and_maybe_save(
         self,
-        now_epoch: float,
+        now: float,
         status: Status,
         value_to_save: float,
     ) -> None:
@@ -173,202 +437,267 @@ class MeasureSession:
         - 1エピソードにつき1回だけ保存
         - trackが"—"なら保存しない
         """
-        if status not in (Status.CHILL, Status.HYPE):
+        if status not in _SAVE_STATUSES:
             self._reset_pending("status != CHILL/HYPE")
             return
 
-        if self.track_text == "—":
+        if self._last_now_playing is None:
             self._reset_pending("no track")
             return
 
         # pending開始 or 状態/曲が変わったらリセットして開始し直す
         if (
-            self._pending_status != status
-            or self._pending_track != self.track_text
+            self._pending_status is not status
+            or self._pending_track_version != self._track_version
             or self._pending_since is None
         ):
             self._pending_status = status
-            self._pending_track = self.track_text
-            self._pending_since = now_epoch
+            self._pending_track_version = self._track_version
+            self._pending_since = now
             self._pending_saved = False
-            _dbg(f"[PENDING] start status={status.value} track='{self.track_text}'")
+            if DEBUG_PRINT:
+                _dbg(f"[PENDING] start status={status.value} track='{self.track_text}'")
             return
 
         # すでに保存済みなら何もしない
         if self._pending_saved:
             return
 
-        elapsed = now_epoch - self._pending_since
+        elapsed = now - self._pending_since
         if elapsed < self._pending_required_sec:
-            _dbg(
-                f"[PENDING] running {status.value} {elapsed:.1f}/{self._pending_required_sec:.0f}s track='{self.track_text}'"
-            )
+            if DEBUG_PRINT:
+                _dbg(
+                    f"[PENDING] running {status.value} {elapsed:.1f}/{self._pending_required_sec:.0f}s track='{self.track_text}'"
+                )
             return
 
         # 15秒継続達成 → 保存
         ts = datetime.now()
-        can = self.db.should_save_event_cooldown(ts, self.cooldown_seconds)
-        _dbg(f"[SAVE] eligible (15s sustained) cooldown_ok={can}")
+        can = self._cooldown_ok(ts)
+        if DEBUG_PRINT:
+            _dbg(f"[SAVE] eligible (15s sustained) cooldown_ok={can}")
 
         if not can:
             return
 
-        # track_text を分割
-        if " - " in self.track_text:
-            artist, track = self.track_text.split(" - ", 1)
-        else:
-            artist, track = "Unknown", self.track_text
+        artist, track = self._track_artist, self._track_name
 
-        self.db.insert_event(
+        self._enqueue_event(
             EventRow(
                 ts=ts,
                 status=status,
                 pnn50=value_to_save,
                 artist_name=artist,
                 track_name=track,
-            )
+            ),
+            now,
         )
         self._pending_saved = True
-        _dbg(
-            f"[SAVE] inserted event: {ts.isoformat(timespec='seconds')} {status.value} pNN50={value_to_save:.2f} '{artist} - {track}'"
-        )
+        if DEBUG_PRINT:
+            _dbg(
+                f"[SAVE] queued event: {ts.isoformat(timespec='seconds')} {status.value} pNN50={value_to_save:.2f} '{artist} - {track}'"
+            )
         self._emit_event_message(
             f"{status.value}を保存: {artist} - {track} (pNN50={value_to_save:.1f}%)"
         )
 
-    def run(self) -> Iterator[LiveState]:
-        self.db.init_db()
-
-        # REST開始
-        self.rest_end_epoch = time.time() + self.rest_total_sec
-        self.rest_p_values = []
-        self.rest_hr_values = []
-        self.baseline_fixed = None
-
-        self._reset_pending("session start")
-        self._last_status = Status.NEUTRAL
-
-        _dbg(
-            f"[MeasureSession] started (REST {self.rest_total_sec}s) port={self.serial_port or 'AUTO'} baud={self.baudrate}"
-        )
-
-        for msg in rr_stream(
-            port=self.serial_port,
-            baudrate=self.baudrate,
-            stop_check=self._stop_check,
-        ):
+    def _iter_beats(self) -> Iterator[Tuple[float, Optional[float], Optional[float]]]:
+        """
+        受信したRRを1拍ずつ計算して (now, hr, pNN50) を返す。REST/RUN 共通の前処理。
+        """
+        # 毎拍使うものはローカルに束縛しておく（self.xxx の属性参照を減らす）
+        # calc/clf はセッション中に差し替えないので安全。_stop は別スレッドから変わるので毎回読む
+        monotonic = time.monotonic
+        add_rr = self.calc.add_rr
+        hr_bpm = self.calc.hr_bpm
+        pnn50_percent = self.calc.pnn50_percent
+        poll_track = self._poll_track
+        push_hr = self._push_hr
+
+        for msg in self._iter_rr():
             if self._stop:
                 _dbg("[MeasureSession] stopped (flag detected)")
                 return
 
-            _dbg(f"[SERIAL] raw='{msg.raw}' rr_ms={msg.rr_ms}")
+            if DEBUG_PRINT:
+                _dbg(f"[SERIAL] raw='{msg.raw}' rr_ms={msg.rr_ms}")
 
-            self._poll_track()
+            # 間隔の判定は壁時計ではなく monotonic で（NTP補正で飛ばない）。1拍につき1回だけ読む
+            now = monotonic()
 
-            ok = self.calc.add_rr(msg.rr_ms)
+            poll_track()
+
+            ok = add_rr(msg.rr_ms)
             if not ok:
                 _dbg("[CALC] add_rr rejected (invalid range) -> continue")
                 continue
 
-            hr = self.calc.hr_bpm()
-            p = self.calc.pnn50_percent(min_diffs=10)
-            self._push_hr(hr)
-
-            hr_s = "None" if hr is None else f"{hr:.1f}"
-            p_s = "None" if p is None else f"{p:.1f}"
-            now = time.time()
-            mode_s = (
-                "REST"
-                if (self.rest_end_epoch is not None and now < self.rest_end_epoch)
-                else "RUN?"
-            )
-            _dbg(f"[CALC] HR={hr_s} bpm  pNN50={p_s}%  mode={mode_s} track='{self.track_text}'")
+            hr = hr_bpm()
+            p = pnn50_percent(min_diffs=10)
+            push_hr(hr, now)
+
+            if DEBUG_PRINT:
+                hr_s = "None" if hr is None else f"{hr:.1f}"
+                p_s = "None" if p is None else f"{p:.1f}"
+                mode_s = (
+                    "REST"
+                    if (self.rest_deadline is not None and now < self.rest_deadline)
+                    else "RUN?"
+                )
+                _dbg(f"[CALC] HR={hr_s} bpm  pNN50={p_s}%  mode={mode_s} track='{self.track_text}'")
 
-            # -----------------------
-            # REST
-            # -----------------------
-            if self.rest_end_epoch is not None and now < self.rest_end_epoch:
-                remain = int(self.rest_end_epoch - now)
+            yield now, hr, p
 
-                # baseline用 pNN50
-                if p is not None:
-                    self.rest_p_values.append(float(p))
-                    _dbg(f"[REST] remain={remain}s  collected_pnn50={len(self.rest_p_values)}")
+        _dbg("[MeasureSession] rr_stream ended")
 
-                # ★baseline用 HR（Noneは捨てる）
-                if hr is not None:
-                    self.rest_hr_values.append(float(hr))
+    def run(self) -> Iterator[LiveState]:
+        self.db.init_db()
 
-                # REST中は保存ロジックを動かさない
-                self._reset_pending("REST mode")
+        # REST開始
+        self.rest_deadline = time.monotonic() + self.rest_total_sec
+        self.rest_p_n, self.rest_p_mean = 0, 0.0
+        self.rest_hr_n, self.rest_hr_mean = 0, 0.0
+        self.baseline_fixed = None
+
+        self._reset_pending("session start")
+        self._last_status = Status.NEUTRAL
+        self._last_event_ts = None
+
+        if DEBUG_PRINT:
+            _dbg(
+                f"[MeasureSession] started (REST {self.rest_total_sec}s) port={self.serial_port or 'AUTO'} baud={self.baudrate}"
+            )
+
+        # REST と RUN は1セッションで1回しか切り替わらないので、フェーズごとにループを分ける
+        # （RUN中の毎拍で REST 判定をしない）
+        # 曲名はセッション中だけ別スレッドで取り続ける
+        poller = self._start_track_poller()
+        self._start_db_writer()
+        beats = self._iter_beats()
+        try:
+            yield from self._run_rest(beats)
+            # REST中にストリームが終わった/停止した場合は baseline が無いので RUN に入らない
+            if self.baseline_fixed is not None:
+                yield from self._run_measure(beats)
+        finally:
+            beats.close()
+            self._track_stop.set()
+            poller.join(timeout=1.0)
+            # 停止・ストリーム終了・エラーのどれでも溜まっている分は書いておく
+            self._flush_events()
+            self._stop_db_writer()
+            self.db.close()
+        # 書き込みに失敗していたらセッションの終わりで知らせる
+        self._raise_db_error()
+
+    def _run_rest(
+        self, beats: Iterator[Tuple[float, Optional[float], Optional[float]]]
+    ) -> Iterator[LiveState]:
+        for now, hr, p in beats:
+            # -----------------------
+            # REST終了 → baseline確定（1回だけ）
+            # -----------------------
+            if now >= self.rest_deadline:
+                baseline_pnn50 = self._finalize_baseline()
 
                 yield LiveState(
-                    mode="REST",
-                    rest_remain_sec=remain,
+                    mode="RUN",
+                    rest_remain_sec=None,
                     hr=hr,
-                    pnn50=(float(p) if p is not None else None),
+                    pnn50=p,
                     smoothed=None,
-                    baseline=None,
+                    baseline=float(baseline_pnn50),
                     status=Status.NEUTRAL,
                     track_text=self.track_text,
-                    hr_points=list(self.hr_points),
+                    hr_points=self._hr_snapshot,
                     event_message=self._consume_event_message(),
                 )
-                continue
+                return
 
             # -----------------------
-            # REST終了 → baseline確定（1回だけ）
+            # REST
             # -----------------------
-            if self.rest_end_epoch is not None and now >= self.rest_end_epoch:
-                self.rest_end_epoch = None
+            remain = int(self.rest_deadline - now)
+
+            # baseline用 pNN50
+            if p is not None:
+                self.rest_p_n += 1
+                self.rest_p_mean += (p - self.rest_p_mean) / self.rest_p_n
+                if DEBUG_PRINT:
+                    _dbg(f"[REST] remain={remain}s  collected_pnn50={self.rest_p_n}")
+
+            # ★baseline用 HR（Noneは捨てる）
+            if hr is not None:
+                self.rest_hr_n += 1
+                self.rest_hr_mean += (hr - self.rest_hr_mean) / self.rest_hr_n
+
+            # REST中は保存ロジックを動かさない
+            self._reset_pending("REST mode")
+
+            yield LiveState(
+                mode="REST",
+                rest_remain_sec=remain,
+                hr=hr,
+                pnn50=p,
+                smoothed=None,
+                baseline=None,
+                status=Status.NEUTRAL,
+                track_text=self.track_text,
+                hr_points=self._hr_snapshot,
+                event_message=self._consume_event_message(),
+            )
 
-                if len(self.rest_p_values) == 0:
-                    _dbg("[REST] baseline failed: no pNN50 samples")
-                    raise RuntimeError(
-                        "REST中にpNN50が取得できませんでした。"
-                        "初期のRRが不安定な可能性があるので、センサを付け直す/数十秒待ってから再実行してね。"
-                    )
+    def _finalize_baseline(self) -> float:
+        self.rest_deadline = None
 
-                if len(self.rest_hr_values) == 0:
-                    _dbg("[REST] baseline failed: no HR samples")
-                    raise RuntimeError(
-                        "REST中にHRが取得できませんでした。"
-                        "RRが途切れている/センサが外れている可能性があります。付け直して再実行してね。"
-                    )
+        if self.rest_p_n == 0:
+            _dbg("[REST] baseline failed: no pNN50 samples")
+            raise RuntimeError(
+                "REST中にpNN50が取得できませんでした。"
+                "初期のRRが不安定な可能性があるので、センサを付け直す/数十秒待ってから再実行してね。"
+            )
 
-                baseline_pnn50 = sum(self.rest_p_values) / len(self.rest_p_values)
-                baseline_hr = sum(self.rest_hr_values) / len(self.rest_hr_values)
+        if self.rest_hr_n == 0:
+            _dbg("[REST] baseline failed: no HR samples")
+            raise RuntimeError(
+                "REST中にHRが取得できませんでした。"
+                "RRが途切れている/センサが外れている可能性があります。付け直して再実行してね。"
+            )
 
-                # ★ここで1回だけ
-                self.clf.set_baseline(baseline_pnn50, baseline_hr)
+        baseline_pnn50 = self.rest_p_mean
+        baseline_hr = self.rest_hr_mean
 
-                self.baseline_fixed = baseline_pnn50
-                self.db.save_baseline(baseline_pnn50)
+        # ★ここで1回だけ
+        self.clf.set_baseline(baseline_pnn50, baseline_hr)
 
-                _dbg(
-                    f"[REST->RUN] baseline_fixed={baseline_pnn50:.2f}% baseline_hr={baseline_hr:.1f}  samples_pnn50={len(self.rest_p_values)} samples_hr={len(self.rest_hr_values)}"
-                )
+        self.baseline_fixed = baseline_pnn50
+        self._submit_db(self.db.save_baseline, baseline_pnn50)
+        self._raise_db_error()
 
-                self._reset_pending("baseline fixed")
+        if DEBUG_PRINT:
+            _dbg(
+                f"[REST->RUN] baseline_fixed={baseline_pnn50:.2f}% baseline_hr={baseline_hr:.1f}  samples_pnn50={self.rest_p_n} samples_hr={self.rest_hr_n}"
+            )
 
-                yield LiveState(
-                    mode="RUN",
-                    rest_remain_sec=None,
-                    hr=hr,
-                    pnn50=(float(p) if p is not None else None),
-                    smoothed=None,
-                    baseline=float(baseline_pnn50),
-                    status=Status.NEUTRAL,
-                    track_text=self.track_text,
-                    hr_points=list(self.hr_points),
-                    event_message=self._consume_event_message(),
-                )
-                continue
+        self._reset_pending("baseline fixed")
+        return baseline_pnn50
+
+    def _run_measure(
+        self, beats: Iterator[Tuple[float, Optional[float], Optional[float]]]
+    ) -> Iterator[LiveState]:
+        clf_update = self.clf.update
+        update_pending = self._update_pending_and_maybe_save
+        baseline_fixed = float(self.baseline_fixed)
+
+        for now, hr, p in beats:
+            # 書き込みスレッドで失敗していたら、次の保存を待たずにこの拍で知らせる
+            self._raise_db_error()
+            self._maybe_flush_events(now)
 
             # -----------------------
             # RUN: baseline確定後、pNN50がまだ None でも UI 更新を返す
             # -----------------------
-            if self.baseline_fixed is not None and p is None:
+            if p is None:
                 _dbg("[RUN] baseline fixed but pNN50 is None (warming up) -> yield RUN/NEUTRAL")
                 self._reset_pending("pNN50 None")
 
@@ -378,33 +707,29 @@ class MeasureSession:
                     hr=hr,
                     pnn50=None,
                     smoothed=None,
-                    baseline=float(self.baseline_fixed),
+                    baseline=baseline_fixed,
                     status=Status.NEUTRAL,
                     track_text=self.track_text,
-                    hr_points=list(self.hr_points),
+                    hr_points=self._hr_snapshot,
                     event_message=self._consume_event_message(),
                 )
                 continue
 
-            if p is None:
-                _dbg("[RUN] pNN50 is None and baseline not fixed? -> skip")
-                self._reset_pending("pNN50 None (no baseline)")
-                continue
-
             # -----------------------
             # RUN: 判定
             # -----------------------
-            sm, base, status = self.clf.update(pnn50=float(p), hr=hr)
-            _dbg(
-                f"[STATE] pNN50={p:.2f}% smoothed={None if sm is None else round(sm,2)} base={None if base is None else round(base,2)} status={status.value}"
-            )
+            sm, base, status = clf_update(pnn50=p, hr=hr)
+            if DEBUG_PRINT:
+                _dbg(
+                    f"[STATE] pNN50={p:.2f}% smoothed={None if sm is None else round(sm,2)} base={None if base is None else round(base,2)} status={status.value}"
+                )
 
             # 保存に使う値は「smoothed優先、なければpNN50」
-            value_for_save = float(sm) if sm is not None else float(p)
+            value_for_save = sm if sm is not None else p
 
             # 15秒継続判定 → 保存
-            self._update_pending_and_maybe_save(
-                now_epoch=time.time(),
+            update_pending(
+                now=now,
                 status=status,
                 value_to_save=value_for_save,
             )
@@ -413,15 +738,13 @@ class MeasureSession:
                 mode="RUN",
                 rest_remain_sec=None,
                 hr=hr,
-                pnn50=float(p),
+                pnn50=p,
                 smoothed=sm,
                 baseline=base,
                 status=status,
                 track_text=self.track_text,
-                hr_points=list(self.hr_points),
+                hr_points=self._hr_snapshot,
                 event_message=self._consume_event_message(),
             )
 
             self._last_status = status
-
-        _dbg("[MeasureSession] rr_stream ended")
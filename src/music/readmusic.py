@@ -1,7 +1,13 @@
 import asyncio
+import threading
 from typing import Optional, Tuple
 from winrt.windows.media.control import GlobalSystemMediaTransportControlsSessionManager as MediaManager
 
+# asyncio.run は呼ぶたびにループを作って壊すので、1本を使い回す
+# （run_until_complete は同時に呼べないのでロックで直列化する）
+_LOOP = asyncio.new_event_loop()
+_LOOP_LOCK = threading.Lock()
+
 
 async def get_current_track():
     """
@@ -33,7 +39,8 @@ def get_now_playing() -> Optional[Tuple[str, str]]:
     (artist, title) を返す同期関数。
     main_event_logger から直接呼べる形にする。
     """
-    media = asyncio.run(get_current_track())
+    with _LOOP_LOCK:
+        media = _LOOP.run_until_complete(get_current_track())
     if media is None:
         return None
 
@@ -8,7 +8,17 @@ import serial
 import serial.tools.list_ports
 
 
-@dataclass(frozen=True)
+# 改行が来ないまま溜まり続けた場合はゴミとして捨てる上限
+MAX_LINE_BYTES = 4096
+
+# 受信行の先頭（例: b"RR,993"）
+_RR_PREFIX = b"RR,"
+_RR_PREFIX_LEN = len(_RR_PREFIX)
+# 文字列にしてから解釈する経路用（ASCIIなので長さは _RR_PREFIX_LEN と同じ）
+_RR_PREFIX_STR = _RR_PREFIX.decode("ascii")
+
+
+@dataclass(frozen=True, slots=True)
 class RRMessage:
     rr_ms: int
     raw: str
@@ -31,6 +41,20 @@ def _auto_detect_port() -> Optional[str]:
     return ports[0].device
 
 
+def _parse_rr_text(line: bytes) -> Optional[RRMessage]:
+    """
+    bytes のまま判定できなかった行を、文字列にして解釈する。解釈できなければ None。
+    """
+    s = line.decode("utf-8", errors="ignore").strip()
+    if not s.startswith(_RR_PREFIX_STR):
+        return None
+    try:
+        rr = int(s[_RR_PREFIX_LEN:])
+    except ValueError:
+        return None
+    return RRMessage(rr_ms=rr, raw=s)
+
+
 def rr_stream(
     port: Optional[str] = None,
     baudrate: int = 115200,
@@ -50,34 +74,42 @@ def rr_stream(
     # timeoutが肝：ここが無いと stop しても抜けられず固まる
     ser = serial.Serial(port, baudrate=baudrate, timeout=1)
 
+    # readline() は1バイトずつ read(1) するので、届いている分をまとめて読んで
+    # こちらで行に切る
+    buf = bytearray()
+
     try:
         while True:
             if stop_check is not None and stop_check():
                 return
 
-            line = ser.readline()  # timeout=1 なので最大1秒で返る
-            if not line:
+            chunk = ser.read(ser.in_waiting or 1)  # timeout=1 なので最大1秒で返る
+            if not chunk:
                 print("[SERIAL] timeout (no data)", flush=True)
                 continue
-            try:
-                s = line.decode("utf-8", errors="ignore").strip()
-            except Exception:
-                continue
-
-            # 例: "RR,993"
-            if not s.startswith("RR,"):
-                continue
-
-            parts = s.split(",", 1)
-            if len(parts) != 2:
-                continue
-
-            try:
-                rr = int(parts[1])
-            except ValueError:
-                continue
-
-            yield RRMessage(rr_ms=rr, raw=s)
+            buf += chunk
+
+            while True:
+                nl = buf.find(b"\n")
+                if nl < 0:
+                    if len(buf) > MAX_LINE_BYTES:
+                        buf.clear()
+                    break
+                line = bytes(buf[:nl]).strip()
+                del buf[: nl + 1]
+
+                # 例: b"RR,993"  プロトコルはASCIIなので、ふつうの行は bytes のまま判定する
+                if line.startswith(_RR_PREFIX):
+                    tail = line[_RR_PREFIX_LEN:].strip()
+                    if tail.isdigit():
+                        # 数字だけと確認済みなので decode は失敗しない（raw に入れる分だけ文字列にする）
+                        yield RRMessage(rr_ms=int(tail), raw=line.decode("ascii"))
+                        continue
+
+                # それ以外（ノイズ混じり・符号付きなど）は従来どおり文字列にして解釈する
+                msg = _parse_rr_text(line)
+                if msg is not None:
+                    yield msg
 
     finally:
         try:
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Deque, Optional
 
 
 @dataclass
@@ -25,16 +26,23 @@ class PNN50Calculator:
     def __init__(self, window_beats: int = 30, max_jump_ms: int = 250):
         self.window_beats = int(window_beats)
         self.max_jump_ms = int(max_jump_ms)
-        self._rr: List[int] = []
+        # 古いRRは maxlen で自動的に押し出す（毎拍のスライスコピーをしない）
+        self._rr: Deque[int] = deque(maxlen=self.window_beats)
+        # 連続RR差の絶対値。add_rr で末尾だけ足していく（_rr と同じ区間を表す）
+        # window_beats < 2 のときは pNN50 を出さないので、maxlen は最低1にしておく
+        self._diffs: Deque[int] = deque(maxlen=max(1, self.window_beats - 1))
+        # _diffs のうち 50ms を超えるものの数（出入りの差分だけ更新する）
+        self._over50 = 0
         self._last_pnn50: Optional[float] = None
 
     def reset(self) -> None:
         self._rr.clear()
+        self._diffs.clear()
+        self._over50 = 0
         self._last_pnn50 = None
 
     def add_rr(self, rr_ms: int) -> bool:
-        rr_ms = int(rr_ms)
-
+        # rr_ms は int で渡すこと（毎拍呼ばれるのでここでは変換しない）
         # ざっくり妥当レンジ（明らかに壊れた値は捨てる）
         # 200ms=300bpm, 2000ms=30bpm
         if rr_ms < 200 or rr_ms > 2000:
@@ -50,13 +58,19 @@ class PNN50Calculator:
         # ★ここが今回の本命修正：
         # 大ジャンプは reject ではなく「バッファリセットして採用」
         if jump > self.max_jump_ms:
-            self._rr = [rr_ms]
+            self._rr.clear()
+            self._diffs.clear()
+            self._over50 = 0
+            self._rr.append(rr_ms)
             return True
 
         # 通常追加
         self._rr.append(rr_ms)
-        if len(self._rr) > self.window_beats:
-            self._rr = self._rr[-self.window_beats :]
+        if len(self._diffs) == self._diffs.maxlen and self._diffs[0] > 50:
+            self._over50 -= 1  # append で押し出される差分
+        self._diffs.append(jump)
+        if jump > 50:
+            self._over50 += 1
         return True
 
     def hr_bpm(self) -> Optional[float]:
@@ -75,11 +89,11 @@ class PNN50Calculator:
         if len(self._rr) < 2:
             return None
 
-        diffs = [abs(self._rr[i] - self._rr[i - 1]) for i in range(1, len(self._rr))]
-        if len(diffs) < int(min_diffs):
+        n_diffs = len(self._diffs)
+        if n_diffs < min_diffs:
             return self._last_pnn50
 
-        cnt = sum(1 for d in diffs if d > 50)
-        value = max(0.0, min(100.0, 100.0 * cnt / len(diffs)))
+        # 50ms超の数は add_rr で維持しているので O(1)
+        value = max(0.0, min(100.0, 100.0 * self._over50 / n_diffs))
         self._last_pnn50 = value
         return value
@@ -1,9 +1,8 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from collections import deque
 from enum import Enum
-from typing import Deque, Optional
+from typing import List, Optional
 
 
 class Status(str, Enum):
@@ -12,27 +11,63 @@ class Status(str, Enum):
     NEUTRAL = "NEUTRAL"
 
 
+# 判定の内部状態は int で持ち、返す時だけ Status に戻す
+_NEUTRAL, _CHILL, _HYPE = 0, 1, 2
+_STATUS_BY_INT = (Status.NEUTRAL, Status.CHILL, Status.HYPE)
+
+
 @dataclass
 class RollingMean:
     """
     移動平均（判定のブレを抑える）
     """
     size: int = 5
-    _buf: Deque[float] = field(default_factory=lambda: deque(maxlen=5))
+    # True なら合計の丸め誤差を補償する（Neumaier）。窓が大きく長時間回す時用
+    stable: bool = False
+    # 固定長のリングバッファ（_idx が次に書く位置、_count が入っている件数）
+    _buf: List[float] = field(init=False, repr=False)
+    _idx: int = field(init=False, repr=False, default=0)
+    _count: int = field(init=False, repr=False, default=0)
+    # 窓内の合計を逐次更新する（mean のたびに sum しない）
+    _sum: float = field(init=False, repr=False, default=0.0)
+    _comp: float = field(init=False, repr=False, default=0.0)
+
+    def __post_init__(self) -> None:
+        # サイズは生成時に1回だけ決める（add のたびにサイズ確認しない）
+        if self.size < 1:
+            raise ValueError(f"RollingMean の size は1以上にしてください: {self.size}")
+        self._buf = [0.0] * self.size
 
     def add(self, x: float) -> None:
-        if self._buf.maxlen != self.size:
-            old = list(self._buf)[-self.size:]
-            self._buf = deque(old, maxlen=self.size)
-        self._buf.append(float(x))
+        x = float(x)
+        i = self._idx
+        if self._count == self.size:
+            # 上書きされる一番古い値との差分だけ合計に足す
+            delta = x - self._buf[i]
+        else:
+            self._count += 1
+            delta = x
+        self._buf[i] = x
+        if self.stable:
+            s = self._sum
+            t = s + delta
+            if abs(s) >= abs(delta):
+                self._comp += (s - t) + delta
+            else:
+                self._comp += (delta - t) + s
+            self._sum = t
+        else:
+            self._sum += delta
+        i += 1
+        self._idx = 0 if i == self.size else i
 
     def mean(self) -> Optional[float]:
-        if not self._buf:
+        if not self._count:
             return None
-        return sum(self._buf) / len(self._buf)
+        return (self._sum + self._comp) / self._count
 
     def is_ready(self) -> bool:
-        return len(self._buf) >= self.size
+        return self._count >= self.size
 
 
 @dataclass
@@ -65,9 +100,16 @@ class FixedBaselineClassifier:
 
     baseline_pnn50: Optional[float] = None
     baseline_hr: Optional[float] = None
-    _current_status: Status = field(default=Status.NEUTRAL, init=False)
-    _transition_target: Status = field(default=Status.NEUTRAL, init=False)
+    _current_status: int = field(default=_NEUTRAL, init=False)
+    _transition_target: int = field(default=_NEUTRAL, init=False)
     _transition_hits: int = field(default=0, init=False)
+    _switch_hits: int = field(default=1, init=False, repr=False)
+
+    # baseline × 比率の判定しきい値（baseline 設定時に1回だけ計算）
+    _chill_pnn50_thr: float = field(default=0.0, init=False, repr=False)
+    _chill_hr_thr: float = field(default=0.0, init=False, repr=False)
+    _hype_hr_thr: float = field(default=0.0, init=False, repr=False)
+    _hype_pnn50_thr: float = field(default=0.0, init=False, repr=False)
 
     def __post_init__(self) -> None:
         self._reset_runtime_state()
@@ -123,46 +165,59 @@ class FixedBaselineClassifier:
         # -------------------
 
         # CHILL: 揺らぎ↑ かつ 心拍が上がっていない
-        candidate = Status.NEUTRAL
+        candidate = _NEUTRAL
 
         if (
-            sm >= self.baseline_pnn50 * self.chill_pnn50_ratio
-            and hr_sm <= self.baseline_hr * self.chill_hr_ratio
+            sm >= self._chill_pnn50_thr
+            and hr_sm <= self._chill_hr_thr
         ):
-            candidate = Status.CHILL
+            candidate = _CHILL
         elif (
-            hr_sm >= self.baseline_hr * self.hype_hr_ratio
-            and sm <= self.baseline_pnn50 * self.hype_pnn50_ratio
+            hr_sm >= self._hype_hr_thr
+            and sm <= self._hype_pnn50_thr
         ):
-            candidate = Status.HYPE
+            candidate = _HYPE
 
         stabilized = self._stabilize_status(candidate)
-        return sm, self.baseline_pnn50, stabilized
+        return sm, self.baseline_pnn50, _STATUS_BY_INT[stabilized]
 
-    def _stabilize_status(self, candidate: Status) -> Status:
-        threshold = max(1, int(self.status_switch_threshold))
+    def _stabilize_status(self, candidate: int) -> int:
+        current = self._current_status
 
-        if candidate == self._current_status:
+        if candidate == current:
             self._transition_hits = 0
             self._transition_target = candidate
-            return self._current_status
+            return current
 
         if candidate != self._transition_target:
             self._transition_target = candidate
             self._transition_hits = 1
-            return self._current_status
+            return current
 
-        self._transition_hits += 1
-        if self._transition_hits >= threshold:
+        hits = self._transition_hits + 1
+        if hits >= self._switch_hits:
             self._current_status = candidate
-            self._transition_hits = 0
             self._transition_target = candidate
+            hits = 0
+            current = candidate
+        self._transition_hits = hits
 
-        return self._current_status
+        return current
+
+    def _update_thresholds(self) -> None:
+        # 比率を途中で変えた場合も、次の set_baseline で反映される
+        if self.baseline_pnn50 is None or self.baseline_hr is None:
+            return
+        self._chill_pnn50_thr = self.baseline_pnn50 * self.chill_pnn50_ratio
+        self._chill_hr_thr = self.baseline_hr * self.chill_hr_ratio
+        self._hype_hr_thr = self.baseline_hr * self.hype_hr_ratio
+        self._hype_pnn50_thr = self.baseline_pnn50 * self.hype_pnn50_ratio
 
     def _reset_runtime_state(self) -> None:
+        self._update_thresholds()
+        self._switch_hits = max(1, int(self.status_switch_threshold))
         self.smooth = RollingMean(size=self.smooth_size)
         self.hr_smooth = RollingMean(size=self.hr_smooth_size)
-        self._current_status = Status.NEUTRAL
-        self._transition_target = Status.NEUTRAL
+        self._current_status = _NEUTRAL
+        self._transition_target = _NEUTRAL
         self._transition_hits = 0
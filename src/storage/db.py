@@ -1,15 +1,17 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 from src.signal.state import Status
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EventRow:
     ts: datetime
     status: Status
@@ -19,17 +21,47 @@ class EventRow:
 
 
 class DigMusicDB:
+    # 同じSQL文字列を使い回して sqlite3 の statement cache に乗せる
+    _SQL_LATEST_EVENT_TS = "SELECT ts FROM events ORDER BY id DESC LIMIT 1"
+
     def __init__(self, db_path: Path):
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 接続は1本を使い回す（GUIスレッドで作って計測スレッドで使うのでロックで直列化）
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
 
     def connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(str(self.db_path))
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        # 接続単位の設定（WALと組み合わせて commit ごとの fsync を減らす）
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=134217728")
+        conn.execute("PRAGMA cache_size=-8000")
         return conn
 
+    @contextmanager
+    def _session(self) -> Iterator[sqlite3.Connection]:
+        """
+        使い回しの接続をロック付きで貸し出す。抜ける時に commit（例外なら rollback）。
+        """
+        with self._lock:
+            if self._conn is None:
+                self._conn = self.connect()
+            with self._conn:
+                yield self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
     def init_db(self) -> None:
-        with self.connect() as conn:
+        with self._session() as conn:
+            # journal_mode はDBファイルに永続化されるので初期化時に1回でOK
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS baseline (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -47,20 +79,20 @@ class DigMusicDB:
                     track_name TEXT NOT NULL
                 )
             """)
-            conn.commit()
+            # ビューアの ORDER BY ts DESC LIMIT n を全件ソートせずに引けるようにする
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts)")
 
     def save_baseline(self, baseline_pnn50: float, ts: Optional[datetime] = None) -> int:
         ts = ts or datetime.now()
-        with self.connect() as conn:
+        with self._session() as conn:
             cur = conn.execute(
                 "INSERT INTO baseline (ts, baseline_pnn50) VALUES (?, ?)",
                 (ts.isoformat(timespec="seconds"), float(baseline_pnn50)),
             )
-            conn.commit()
             return int(cur.lastrowid)
 
     def load_latest_baseline(self) -> Optional[float]:
-        with self.connect() as conn:
+        with self._session() as conn:
             row = conn.execute(
                 "SELECT baseline_pnn50 FROM baseline ORDER BY id DESC LIMIT 1"
             ).fetchone()
@@ -69,27 +101,44 @@ class DigMusicDB:
             return float(row["baseline_pnn50"])
 
     def insert_event(self, event: EventRow) -> int:
-        with self.connect() as conn:
+        with self._session() as conn:
             cur = conn.execute("""
                 INSERT INTO events (ts, status, pnn50, artist_name, track_name)
                 VALUES (?, ?, ?, ?, ?)
-            """, (
-                event.ts.isoformat(timespec="seconds"),
-                event.status.value,
-                float(event.pnn50),
-                event.artist_name,
-                event.track_name,
-            ))
-            conn.commit()
+            """, self._event_params(event))
             return int(cur.lastrowid)
 
+    def insert_events_batch(self, events: Iterable[EventRow]) -> int:
+        """
+        複数イベントを1トランザクション(commit 1回)でまとめて保存する。
+        戻り値は保存した件数。
+        """
+        params = [self._event_params(e) for e in events]
+        if not params:
+            return 0
+        with self._session() as conn:
+            conn.executemany("""
+                INSERT INTO events (ts, status, pnn50, artist_name, track_name)
+                VALUES (?, ?, ?, ?, ?)
+            """, params)
+        return len(params)
+
+    @staticmethod
+    def _event_params(event: EventRow) -> tuple:
+        return (
+            event.ts.isoformat(timespec="seconds"),
+            event.status.value,
+            float(event.pnn50),
+            event.artist_name,
+            event.track_name,
+        )
+
     def should_save_event_cooldown(self, ts: datetime, cooldown_seconds: int = 60) -> bool:
-        with self.connect() as conn:
-            row = conn.execute("SELECT ts FROM events ORDER BY id DESC LIMIT 1").fetchone()
+        # ts は固定幅のISO文字列なので、datetimeに戻さず文字列比較で判定できる
+        # （(ts - last_ts) >= cooldown  <=>  last_ts <= ts - cooldown）
+        cutoff = (ts - timedelta(seconds=cooldown_seconds)).isoformat(timespec="microseconds")
+        with self._session() as conn:
+            row = conn.execute(self._SQL_LATEST_EVENT_TS).fetchone()
             if row is None:
                 return True
-            try:
-                last_ts = datetime.fromisoformat(row["ts"])
-            except Exception:
-                return True
-            return (ts - last_ts).total_seconds() >= cooldown_seconds
+            return row["ts"] <= cutoff
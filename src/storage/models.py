@@ -10,7 +10,7 @@ class Status(str, Enum):
     HYPE = "HYPE"
     NEUTRAL = "NEUTRAL"
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Event:
     ts: datetime
     status: Status
@@ -2,29 +2,46 @@ from __future__ import annotations
 
 import sqlite3
 from datetime import datetime
-from typing import Optional, List
+from typing import Iterable, Optional, List
 
 from .models import Event, Status
 
 
-def insert_event(conn: sqlite3.Connection, event: Event) -> int:
-    cur = conn.execute(
-        """
-        INSERT INTO events (ts, status, pnn50, track_name, artist_name)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (
-            event.ts.isoformat(),
-            event.status.value,
-            float(event.pnn50),
-            event.track_name,
-            event.artist_name,
-        ),
+_SQL_INSERT_EVENT = """
+    INSERT INTO events (ts, status, pnn50, track_name, artist_name)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+def _event_params(event: Event) -> tuple:
+    return (
+        event.ts.isoformat(),
+        event.status.value,
+        float(event.pnn50),
+        event.track_name,
+        event.artist_name,
     )
+
+
+def insert_event(conn: sqlite3.Connection, event: Event) -> int:
+    cur = conn.execute(_SQL_INSERT_EVENT, _event_params(event))
     conn.commit()
     return int(cur.lastrowid)
 
 
+def insert_events(conn: sqlite3.Connection, events: Iterable[Event]) -> int:
+    """
+    複数イベントを1トランザクションでまとめて保存する（commit は1回だけ）。
+    戻り値は保存した件数。
+    """
+    params = [_event_params(e) for e in events]
+    if not params:
+        return 0
+    with conn:
+        conn.executemany(_SQL_INSERT_EVENT, params)
+    return len(params)
+
+
 def get_latest_event(conn: sqlite3.Connection) -> Optional[dict]:
     row = conn.execute(
         """
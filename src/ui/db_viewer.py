@@ -3,8 +3,7 @@ import csv
 import sqlite3
 from pathlib import Path
 
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QStandardItem, QStandardItemModel
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
 from PySide6.QtWidgets import (
     QApplication,
     QWidget,
@@ -24,6 +23,82 @@ from PySide6.QtWidgets import (
 # DBパス（必要ならここを変更）
 DEFAULT_DB_PATH = Path("data") / "digmusic.db"
 
+COLUMNS = ["ts", "status", "pnn50", "artist_name", "track_name"]
+HEADER_LABELS = ["日時", "状態", "pNN50", "アーティスト", "曲名"]
+# 列幅の初期値（px）。行数に関係なく固定で、あとはユーザーがドラッグで変える
+COLUMN_WIDTHS = [170, 90, 80, 200, 260]
+# CSV出力でカーソルから一度に読む行数
+EXPORT_FETCH_ROWS = 1000
+# 絞り込み条件を連続で変えた時は、最後の変更からこの時間だけ待って1回だけ再検索する
+RELOAD_DEBOUNCE_MS = 150
+
+# 絞り込み条件に関わらず同じSQL文字列を使う（sqlite3 の statement cache に乗る）
+# 条件が無い時は ? = 'ALL' / ? = '' 側で真になる
+EVENTS_QUERY_SQL = """
+SELECT ts, status, pnn50, artist_name, track_name
+FROM events
+WHERE (? = 'ALL' OR status = ?)
+  AND (? = '' OR track_name LIKE ? ESCAPE '\\' OR artist_name LIKE ? ESCAPE '\\')
+ORDER BY ts DESC
+LIMIT ?
+"""
+
+
+def _escape_like(s: str) -> str:
+    # LIKE のワイルドカードを文字として検索させる
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class EventTableModel(QAbstractTableModel):
+    """
+    検索結果の行をそのまま持つ読み取り専用モデル。
+    セルごとに QStandardItem を作らず、表示に必要な分だけ data() で返す。
+    """
+
+    # 数値列は右寄せ
+    _PNN50_COL = COLUMNS.index("pnn50")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+
+    def set_rows(self, rows) -> None:
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            v = self._rows[index.row()][index.column()]
+            return "" if v is None else str(v)
+        if role == Qt.TextAlignmentRole:
+            if index.column() == self._PNN50_COL:
+                return Qt.AlignRight | Qt.AlignVCenter
+            return Qt.AlignLeft | Qt.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADER_LABELS[section]
+        return super().headerData(section, orientation, role)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # 値そのもので並べる（pNN50 は数値順）。None は先頭に寄せる
+        self.layoutAboutToBeChanged.emit()
+        self._rows.sort(
+            key=lambda r: (r[column] is not None, r[column]),
+            reverse=(order == Qt.DescendingOrder),
+        )
+        self.layoutChanged.emit()
+
 
 class DbViewer(QWidget):
     def __init__(self, db_path: Path):
@@ -50,12 +125,15 @@ class DbViewer(QWidget):
         self.open_btn = QPushButton("DBを選択...")
 
         self.table = QTableView()
-        self.model = QStandardItemModel(0, 0)
+        self.model = EventTableModel(self)
         self.table.setModel(self.model)
         self.table.setSortingEnabled(True)
         self.table.setAlternatingRowColors(True)
-        self.table.horizontalHeader().setStretchLastSection(True)
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setStretchLastSection(True)
+        for col, width in enumerate(COLUMN_WIDTHS):
+            self.table.setColumnWidth(col, width)
 
         # --- レイアウト ---
         root = QVBoxLayout()
@@ -81,13 +159,19 @@ class DbViewer(QWidget):
         self.setLayout(root)
 
         # --- イベント ---
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(RELOAD_DEBOUNCE_MS)
+        self._reload_timer.timeout.connect(self.reload)
+
         self.reload_btn.clicked.connect(self.reload)
         self.export_btn.clicked.connect(self.export_csv)
         self.open_btn.clicked.connect(self.pick_db)
 
-        self.status_combo.currentIndexChanged.connect(self.reload)
+        # スピンボックス長押しなどで毎回クエリを投げないよう、変更はまとめてから反映する
+        self.status_combo.currentIndexChanged.connect(self.schedule_reload)
         self.keyword_edit.returnPressed.connect(self.reload)
-        self.limit_spin.valueChanged.connect(self.reload)
+        self.limit_spin.valueChanged.connect(self.schedule_reload)
 
         # 初回ロード
         self.connect_db()
@@ -106,7 +190,7 @@ class DbViewer(QWidget):
             return
 
         try:
-            self.conn = sqlite3.connect(str(self.db_path))
+            self.conn = sqlite3.connect(str(self.db_path), cached_statements=256)
             self.conn.row_factory = sqlite3.Row
         except Exception as e:
             QMessageBox.critical(self, "DB Error", f"DB接続に失敗:\n{e}")
@@ -116,33 +200,18 @@ class DbViewer(QWidget):
         keyword = self.keyword_edit.text().strip()
         limit = int(self.limit_spin.value())
 
-        sql = """
-        SELECT ts, status, pnn50, artist_name, track_name
-        FROM events
-        """
-
-        where = []
-        params = []
+        like = f"%{_escape_like(keyword)}%"
+        params = (status, status, keyword, like, like, limit)
 
-        if status != "ALL":
-            where.append("status = ?")
-            params.append(status)
+        return EVENTS_QUERY_SQL, params
 
-        if keyword:
-            where.append("(track_name LIKE ? OR artist_name LIKE ?)")
-            like = f"%{keyword}%"
-            params.extend([like, like])
-
-        if where:
-            sql += " WHERE " + " AND ".join(where)
-
-        sql += " ORDER BY ts DESC"
-        sql += " LIMIT ?"
-        params.append(limit)
-
-        return sql, params
+    def schedule_reload(self):
+        # 待ち中なら延長される（start し直すと残り時間がリセットされる）
+        self._reload_timer.start()
 
     def reload(self):
+        # 直接呼ばれた時は、予約済みの再検索は不要
+        self._reload_timer.stop()
         if not self.conn:
             return
 
@@ -167,31 +236,8 @@ class DbViewer(QWidget):
             QMessageBox.critical(self, "Query Error", f"クエリ失敗:\n{e}\n\nSQL:\n{sql}\n\nParams:\n{params}")
             return
 
-        columns = ["ts", "status", "pnn50", "artist_name", "track_name"]
-
-        header_labels = ["日時", "状態", "pNN50", "アーティスト", "曲名"]
-
-        self.model = QStandardItemModel(0, len(columns))
-        self.model.setHorizontalHeaderLabels(header_labels)
-
-
-        for r in rows:
-            items = []
-            for h in columns:
-                v = r[h]
-                it = QStandardItem("" if v is None else str(v))
-                # 数値列は右寄せ
-                if h == "pnn50":
-                    it.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                else:
-                    it.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-                # 編集不可
-                it.setEditable(False)
-                items.append(it)
-            self.model.appendRow(items)
-
-        self.table.setModel(self.model)
-        self.table.resizeColumnsToContents()
+        # 列幅は生成時に決めた固定値のまま（再読み込みのたびに全セルを測り直さない）
+        self.model.set_rows(rows)
 
     def export_csv(self):
         if not self.conn:
@@ -208,20 +254,21 @@ class DbViewer(QWidget):
 
         sql, params = self.build_query()
         try:
-            rows = self.conn.execute(sql, params).fetchall()
+            cur = self.conn.execute(sql, params)
         except Exception as e:
             QMessageBox.critical(self, "Export Error", f"取得失敗:\n{e}")
             return
 
-        columns = ["ts", "status", "pnn50", "artist_name", "track_name"]
-        header_labels = ["日時", "状態", "pNN50", "アーティスト", "曲名"]
-
+        # 全件を fetchall せず、カーソルから少しずつ読みながら書き出す
         try:
             with open(path, "w", newline="", encoding="utf-8") as f:
                 w = csv.writer(f)
-                w.writerow(header_labels)
-                for r in rows:
-                    w.writerow([r[c] for c in columns])
+                w.writerow(HEADER_LABELS)
+                while True:
+                    batch = cur.fetchmany(EXPORT_FETCH_ROWS)
+                    if not batch:
+                        break
+                    w.writerows(batch)
 
         except Exception as e:
             QMessageBox.critical(self, "Export Error", f"CSV保存失敗:\n{e}")
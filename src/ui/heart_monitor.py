@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import time
-from typing import List, Tuple
+from bisect import bisect_left
+from operator import itemgetter
+from typing import Optional, Sequence, Tuple
 
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QPainter, QPen
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtGui import QPainter, QPen, QPixmap, QPolygonF
 from PySide6.QtWidgets import QWidget, QSizePolicy
 
+_point_time = itemgetter(0)
+
 
 class HeartMonitorWidget(QWidget):
     def __init__(self, parent=None, window_sec: float = 10.0, y_min: float = 0.0, y_max: float = 200.0):
@@ -14,38 +18,66 @@ class HeartMonitorWidget(QWidget):
         self.window_sec = float(window_sec)
         self.y_min = float(y_min)
         self.y_max = float(y_max)
-        self._points: List[Tuple[float, float]] = []
+        self._points: Sequence[Tuple[float, float]] = ()
+        # グリッドはサイズが変わった時だけ描き直す
+        self._grid_pix: Optional[QPixmap] = None
 
         self.setMinimumHeight(140)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
 
-    def set_points(self, points: List[Tuple[float, float]]):
+    def set_points(self, points: Sequence[Tuple[float, float]]):
+        # points は時刻(monotonic)の昇順であること
         self._points = points
         self.update()
 
+    def resizeEvent(self, event):
+        self._grid_pix = None
+        super().resizeEvent(event)
+
+    def _plot_rect(self):
+        return self.rect().adjusted(12, 12, -12, -12)
+
+    def _grid_pixmap(self) -> QPixmap:
+        dpr = self.devicePixelRatioF()
+        # 別DPIの画面へ移動した時も作り直す
+        if self._grid_pix is None or self._grid_pix.devicePixelRatio() != dpr:
+            pix = QPixmap(self.size() * dpr)
+            pix.setDevicePixelRatio(dpr)
+            pix.fill(Qt.transparent)
+
+            painter = QPainter(pix)
+            painter.setRenderHint(QPainter.Antialiasing)
+            rect = self._plot_rect()
+
+            # grid
+            grid_pen = QPen(Qt.black)
+            grid_pen.setWidth(1)
+            grid_pen.setStyle(Qt.DotLine)
+            painter.setPen(grid_pen)
+
+            for i in range(1, 4):
+                y = rect.top() + rect.height() * i / 4.0
+                painter.drawLine(int(rect.left()), int(y), int(rect.right()), int(y))
+
+            painter.end()
+            self._grid_pix = pix
+        return self._grid_pix
+
     def paintEvent(self, event):
         painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._grid_pixmap())
         painter.setRenderHint(QPainter.Antialiasing)
 
-        rect = self.rect().adjusted(12, 12, -12, -12)
-
-        # grid
-        grid_pen = QPen(Qt.black)
-        grid_pen.setWidth(1)
-        grid_pen.setStyle(Qt.DotLine)
-        painter.setPen(grid_pen)
-
-        for i in range(1, 4):
-            y = rect.top() + rect.height() * i / 4.0
-            painter.drawLine(int(rect.left()), int(y), int(rect.right()), int(y))
+        rect = self._plot_rect()
 
         if len(self._points) < 2:
             painter.end()
             return
 
-        now = time.time()
+        now = time.monotonic()  # hr_points の時刻は time.monotonic()
         start = now - self.window_sec
-        visible = [(t, hr) for (t, hr) in self._points if t >= start]
+        # 点は時刻順に並んでいるので、窓の先頭だけ二分探索して後ろを切り出す
+        visible = self._points[bisect_left(self._points, start, key=_point_time):]
         if len(visible) < 2:
             painter.end()
             return
@@ -61,18 +93,19 @@ class HeartMonitorWidget(QWidget):
         line_pen.setJoinStyle(Qt.RoundJoin)
         painter.setPen(line_pen)
 
-        def map_x(t: float) -> float:
-            return rect.left() + (t - start) / self.window_sec * rect.width()
-
-        def map_y(hr: float) -> float:
-            hr = max(y_min, min(y_max, hr))
-            return rect.bottom() - (hr - y_min) / (y_max - y_min) * rect.height()
-
-        for i in range(1, len(visible)):
-            x1 = map_x(visible[i - 1][0])
-            y1 = map_y(visible[i - 1][1])
-            x2 = map_x(visible[i][0])
-            y2 = map_y(visible[i][1])
-            painter.drawLine(int(x1), int(y1), int(x2), int(y2))
+        # 座標変換の係数は先に出しておき、線分ごとに drawLine せず1本の折れ線で描く
+        left = rect.left()
+        bottom = rect.bottom()
+        sx = rect.width() / self.window_sec
+        sy = rect.height() / (y_max - y_min)
+
+        poly = QPolygonF([
+            QPointF(
+                left + (t - start) * sx,
+                bottom - (max(y_min, min(y_max, hr)) - y_min) * sy,
+            )
+            for t, hr in visible
+        ])
+        painter.drawPolyline(poly)
 
         painter.end()
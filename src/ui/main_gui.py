@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-import sys
 import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Sequence, Tuple
 
 from PySide6.QtCore import Qt, QThread, Signal, QObject, QTimer
 from PySide6.QtWidgets import (
@@ -20,6 +19,7 @@ from PySide6.QtWidgets import (
 from src.measure.session import MeasureSession, LiveState
 from src.storage.db import DigMusicDB
 from src.signal.state import Status
+from src.ui.db_viewer import DbViewer
 from src.ui.heart_monitor import HeartMonitorWidget
 
 
@@ -33,12 +33,33 @@ def format_mmss(seconds: int) -> str:
     return f"{m}:{s:02d}"
 
 
-def status_color(status: Status) -> str:
-    if status == Status.HYPE:
-        return "#FF7A1A"
-    if status == Status.CHILL:
-        return "#BDEFFF"
-    return "#EAEAEA"
+def _status_card_qss(color: str) -> str:
+    return f"QFrame#statusCard {{ background: {color}; border-radius: 28px; }}"
+
+
+# 状態ごとの (表示テキスト, カードのスタイル) は起動時に1回だけ作る
+# （on_update では辞書を1回引くだけ。色の比較や f-string 組み立てをしない）
+_STATUS_TABLE: Dict[Status, Tuple[str, str]] = {
+    Status.HYPE: (Status.HYPE.value, _status_card_qss("#FF7A1A")),
+    Status.CHILL: (Status.CHILL.value, _status_card_qss("#BDEFFF")),
+    Status.NEUTRAL: (Status.NEUTRAL.value, _status_card_qss("#EAEAEA")),
+}
+# REST中は NEUTRAL と同じ見た目
+REST_CARD_QSS = _STATUS_TABLE[Status.NEUTRAL][1]
+
+# HRモニタの再描画は最大でこの間隔（約30fps）にまとめる
+MONITOR_REFRESH_MS = 33
+
+# 数値ラベルの固定部分
+_HR_PREFIX = "HR: "
+_HR_SUFFIX = " bpm"
+_PNN50_PREFIX = "pNN50: "
+_BASE_PREFIX = "   base: "
+_UNSET = object()  # まだ一度も表示していない値の目印（None と区別する）
+
+
+def _fmt1(v: Optional[float]) -> str:
+    return "-" if v is None else f"{v:.1f}"
 
 
 class MeasureWorker(QObject):
@@ -80,18 +101,47 @@ class MainWindow(QWidget):
         layout.addWidget(self.stack)
         self.setLayout(layout)
 
+        # 初めて計測画面に切り替えた時にまとめてレイアウト計算しないよう、先に確定させておく
+        self.home_screen.layout().activate()
+        self.measure_screen.layout().activate()
+
         self.thread: Optional[QThread] = None
         self.worker: Optional[MeasureWorker] = None
+        # ログビューアは同じプロセス内で開き、2回目以降は使い回す
+        self._viewer: Optional[DbViewer] = None
+
+        # エラー表示は1つを使い回す。show() で出すので exec() のように処理を止めない
+        self._err_box = QMessageBox(QMessageBox.Critical, "Error", "", QMessageBox.Ok, self)
+        self._err_box.setModal(True)
 
         # REST timer (UI independent)
+        # 表示は1秒単位なので、次の秒の切り替わりに合わせて1回ずつ起こす（単発タイマーを毎回張り直す）
         self.ui_rest_timer = QTimer(self)
-        self.ui_rest_timer.setInterval(200)  # 見た目滑らかにしたいなら200ms
+        self.ui_rest_timer.setSingleShot(True)
+        self.ui_rest_timer.setTimerType(Qt.PreciseTimer)
         self.ui_rest_timer.timeout.connect(self._tick_rest_timer)
+        self._last_rest_remain: Optional[int] = None
         self.rest_total_sec = 60
-        self.rest_start_epoch: Optional[float] = None
+        self.rest_started_at: Optional[float] = None
         self.in_rest_mode = False
         self._event_message_expire = 0.0
 
+        # 最後に表示した内容（同じなら setText / setStyleSheet を呼ばない）
+        self._label_text: Dict[QLabel, str] = {}
+        # 数値は前回と同じ値なら文字列を作り直さない
+        self._last_hr: object = _UNSET
+        self._last_smoothed: object = _UNSET
+        self._last_baseline: object = _UNSET
+        self._ptxt = "-"
+        self._btxt = "-"
+        self._card_qss: Optional[str] = None
+
+        # HRモニタに渡す最新の点（描画はタイマーでまとめて行う）
+        self._pending_points: Optional[Sequence[Tuple[float, float]]] = None
+        self._monitor_timer = QTimer(self)
+        self._monitor_timer.setInterval(MONITOR_REFRESH_MS)
+        self._monitor_timer.timeout.connect(self._flush_monitor)
+
         # # UI alive heartbeat (debug)
         # self._ui_hb = QTimer(self)
         # self._ui_hb.setInterval(1000)
@@ -142,9 +192,7 @@ class MainWindow(QWidget):
         # Status card
         self.status_card = QFrame()
         self.status_card.setObjectName("statusCard")
-        self.status_card.setStyleSheet("""
-            QFrame#statusCard { background: #EAEAEA; border-radius: 28px; }
-        """)
+        self.status_card.setStyleSheet(REST_CARD_QSS)
         self.status_card.setMinimumHeight(200)
 
         card_layout = QVBoxLayout()
@@ -226,33 +274,49 @@ class MainWindow(QWidget):
         w.setLayout(root)
         return w
 
+    def _set_label(self, label: QLabel, text: str) -> None:
+        if self._label_text.get(label) != text:
+            self._label_text[label] = text
+            label.setText(text)
+
+    def _set_card_qss(self, qss: str) -> None:
+        # スタイルシートの再適用は重い（QSSの再パース＋再polish）ので変わった時だけ
+        if qss is not self._card_qss:
+            self._card_qss = qss
+            self.status_card.setStyleSheet(qss)
+
     # ---------- REST Timer tick (UI independent) ----------
     def _start_rest_ui_timer(self):
         self.in_rest_mode = True
-        self.rest_start_epoch = time.time()
+        self.rest_started_at = time.monotonic()
         # ここで即座に 1:00 表示
-        self.rest_label.setText(f"REST {format_mmss(self.rest_total_sec)}")
-        self.big_status.setText("REST")
-        self.status_card.setStyleSheet("""
-            QFrame#statusCard { background: #EAEAEA; border-radius: 28px; }
-        """)
-        self.ui_rest_timer.start()
+        self._last_rest_remain = self.rest_total_sec
+        self._set_label(self.rest_label, f"REST {format_mmss(self.rest_total_sec)}")
+        self._set_label(self.big_status, "REST")
+        self._set_card_qss(REST_CARD_QSS)
+        self._schedule_rest_tick()
+
+    def _schedule_rest_tick(self):
+        elapsed_ms = int((time.monotonic() - self.rest_started_at) * 1000)
+        self.ui_rest_timer.start(1000 - elapsed_ms % 1000)
 
     def _stop_rest_ui_timer(self):
         self.in_rest_mode = False
-        self.rest_start_epoch = None
+        self.rest_started_at = None
         self.ui_rest_timer.stop()
 
     def _tick_rest_timer(self):
-        if not self.in_rest_mode or self.rest_start_epoch is None:
+        if not self.in_rest_mode or self.rest_started_at is None:
             return
-        elapsed = time.time() - self.rest_start_epoch
+        elapsed = time.monotonic() - self.rest_started_at
         remain = self.rest_total_sec - int(elapsed)
         remain = max(0, remain)
-        self.rest_label.setText(f"REST {format_mmss(remain)}")
-        if remain <= 0:
-            # 表示上は0になったら止めてOK（実際のbaseline確定は計測側がやる）
-            self.ui_rest_timer.stop()
+        if remain != self._last_rest_remain:
+            self._last_rest_remain = remain
+            self._set_label(self.rest_label, f"REST {format_mmss(remain)}")
+        # 表示上は0になったら止めてOK（実際のbaseline確定は計測側がやる）
+        if remain > 0:
+            self._schedule_rest_tick()
 
     # ---------- Controls ----------
     def start_measurement(self):
@@ -260,7 +324,7 @@ class MainWindow(QWidget):
         self.start_btn.setEnabled(False)
         self.logs_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
-        self.info_label.setText("計測開始：安静にしてください")
+        self._set_label(self.info_label, "計測開始：安静にしてください")
 
         # RESTタイマーはUIで独立スタート
         self._start_rest_ui_timer()
@@ -288,62 +352,78 @@ class MainWindow(QWidget):
         self.thread.start()
 
     def stop_measurement(self):
-        self.info_label.setText("停止処理中...")
+        self._set_label(self.info_label, "停止処理中...")
         self.stop_btn.setEnabled(False)
         if self.worker:
             self.worker.stop()
 
     def on_update(self, st: LiveState):
-        now = time.time()
+        now = time.monotonic()
         # 曲名は常時表示
-        self.track_label.setText(st.track_text)
+        self._set_label(self.track_label, st.track_text)
 
         # HRモニタは常時更新
-        if st.hr is None:
-            self.hr_text.setText("HR: - bpm")
-        else:
-            self.hr_text.setText(f"HR: {st.hr:.1f} bpm")
-        self.monitor_widget.set_points(st.hr_points)
-
-        # pNN50/base
-        ptxt = "-" if st.smoothed is None else f"{st.smoothed:.1f}"
-        btxt = "-" if st.baseline is None else f"{st.baseline:.1f}"
-        self.pnn50_line.setText(f"pNN50: {ptxt}   base: {btxt}")
+        if st.hr != self._last_hr:
+            self._last_hr = st.hr
+            self._set_label(self.hr_text, _HR_PREFIX + _fmt1(st.hr) + _HR_SUFFIX)
+        self._pending_points = st.hr_points
+        if not self._monitor_timer.isActive():
+            self._monitor_timer.start()
+
+        # pNN50/base（変わった側だけ整形し直す。base は RUN 中ずっと同じ）
+        changed = False
+        if st.smoothed != self._last_smoothed:
+            self._last_smoothed = st.smoothed
+            self._ptxt = _fmt1(st.smoothed)
+            changed = True
+        if st.baseline != self._last_baseline:
+            self._last_baseline = st.baseline
+            self._btxt = _fmt1(st.baseline)
+            changed = True
+        if changed:
+            self._set_label(self.pnn50_line, _PNN50_PREFIX + self._ptxt + _BASE_PREFIX + self._btxt)
 
         if st.event_message:
             self._event_message_expire = now + 4.0
-            self.info_label.setText(st.event_message)
+            self._set_label(self.info_label, st.event_message)
         elif now >= self._event_message_expire:
             if st.mode == "REST":
-                self.info_label.setText("RESTモード：安静にしてください")
+                self._set_label(self.info_label, "RESTモード：安静にしてください")
             else:
-                self.info_label.setText("RUNモード：状態を解析しています")
+                self._set_label(self.info_label, "RUNモード：状態を解析しています")
 
         # REST -> RUN に入ったらUI側RESTタイマーを止め、RUN表示へ
         if st.mode == "RUN":
             if self.in_rest_mode:
                 self._stop_rest_ui_timer()
                 if now >= self._event_message_expire:
-                    self.info_label.setText("RUNモード：状態を解析しています")
-
-            self.rest_label.setText("")  # RUN中は非表示
-            self.big_status.setText(st.status.value)
-            self.status_card.setStyleSheet(f"""
-                QFrame#statusCard {{
-                    background: {status_color(st.status)};
-                    border-radius: 28px;
-                }}
-            """)
+                    self._set_label(self.info_label, "RUNモード：状態を解析しています")
+
+            self._set_label(self.rest_label, "")  # RUN中は非表示
+            status_text, card_qss = _STATUS_TABLE[st.status]
+            self._set_label(self.big_status, status_text)
+            self._set_card_qss(card_qss)
         else:
             # REST中の見た目はUI側タイマーに任せる（ここではbig_status等を上書きしない）
             pass
 
+    def _flush_monitor(self):
+        # 前回から新しい点が来ていなければタイマーを止める（次の on_update で再開）
+        if self._pending_points is None:
+            self._monitor_timer.stop()
+            return
+        self.monitor_widget.set_points(self._pending_points)
+        self._pending_points = None
+
     def on_error(self, msg: str):
-        QMessageBox.critical(self, "Error", msg)
+        self._err_box.setText(msg)
+        self._err_box.show()
 
     def on_finished(self):
         # 計測が終わったらUI RESTタイマーも止める
         self._stop_rest_ui_timer()
+        self._monitor_timer.stop()
+        self._pending_points = None
 
         if self.thread:
             self.thread.quit()
@@ -359,8 +439,17 @@ class MainWindow(QWidget):
         self.stack.setCurrentWidget(self.home_screen)
 
     def open_logs(self):
-        import subprocess
-        subprocess.Popen([sys.executable, "src/ui/db_viewer.py"])
+        # 別の Python を起動せず、同じ QApplication 上で別ウィンドウとして出す
+        if self._viewer is None:
+            self._viewer = DbViewer(DB_PATH)
+        else:
+            # 前回開いたときに DB が無かった場合などは、繋ぎ直してから読み込む
+            if self._viewer.conn is None:
+                self._viewer.connect_db()
+            self._viewer.reload()
+        self._viewer.show()
+        self._viewer.raise_()
+        self._viewer.activateWindow()
 
 
 def main():